@@ -9,7 +9,8 @@ setup(
         "pandas",
         "matplotlib",
         "scipy",
-        "scikit-learn"
+        "scikit-learn",
+        "pyarrow",
         # Add any other dependencies here
     ],
     python_requires=">=3.6",
@@ -9,25 +9,61 @@ be present at 'input_path/infile'. You can either run this script
 directly or use DataLoader.
 class elsewhere to get train and test splits. When run as script,
 train and test splits are.
-stored at `output_path/train.csv' and `output_path/test.csv' respectively.
+stored at `output_path/train.parquet' and `output_path/test.parquet'
+respectively (or as csv files, see `output_format`).
 During split, data is .
 shuffled and stratified based on `income_range` (see `_split` for more detail)
 Run - `python ingest_data.py [-h | --help]`.
 to get more information about the accepted arguments.
 """
+import copy
+import logging
 import tarfile
+import time
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 from urllib import request
 import numpy as np
 import pandas as pd
 import progressbar
-from sklearn.model_selection import train_test_split as tts
+from sklearn.model_selection import StratifiedShuffleSplit
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+CHUNK_SIZE = 1 << 20  # bytes read from the HTTP response per iteration
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True)
+    def _bin_income(mi, out):
+        """Numba version of `DataLoader._income_range`, fills `out`"""
+        for i in prange(mi.shape[0]):
+            v = mi[i] / np.float32(1.5)
+            out[i] = np.int8(min(max(v, np.float32(0)), np.float32(4)))
+
+else:
+    _bin_income = None
+
+
 class PBar:
-    """Utility class to show the file download progress."""
+    """Utility class to show the file download progress.
 
-    def __init__(self) -> None:
+    The bar is redrawn at most once every `min_interval` seconds.
+    """
+
+    def __init__(self, min_interval: float = 0.02) -> None:
         self.pbar = None
+        self.min_interval = min_interval
+        self._last_ts = 0.0
 
     def __call__(self, block_num, block_size, total_size):
         if not self.pbar:
@@ -35,12 +71,32 @@ class PBar:
             self.pbar.start()
         downloaded = block_size * block_num
         if downloaded < total_size:
-            self.pbar.update(downloaded)
+            now = time.monotonic()
+            if now - self._last_ts > self.min_interval:
+                self.pbar.update(downloaded)
+                self._last_ts = now
         else:
             self.pbar.finish()
             self.pbar = None
 
 
+class ProgressReader:
+    """File-like wrapper reporting every `read` to a `PBar` style hook."""
+
+    def __init__(self, fileobj, total_size: int, hook) -> None:
+        self.fileobj = fileobj
+        self.total_size = total_size
+        self.hook = hook
+        self.block_num = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.fileobj.read(size)
+        self.block_num += 1
+        block_size = size if size > 0 else len(chunk)
+        self.hook(self.block_num, block_size, self.total_size)
+        return chunk
+
+
 class DataLoader:
     """Download a datafile or Load from disk and split it into train and test.
     This class can be used as a base class
@@ -51,15 +107,26 @@ class DataLoader:
         input_path : str
             Path of the input directory to read infile
         output_path : str
-            Path of the output directory to store train.csv and test.csv
+            Path of the output directory to store train and test files
         infile : str
-            Name of the raw input csv datafile
+            Name of the raw input csv (or parquet) datafile
         download : bool
             Whether file should be downloaded
             or loaded from `input_path/infile (default is False).
         test_size : float
             Portion of data to keep as test
             set - 0 < test_size < 0.5 (default is 0.2).
+        dtype : dict
+            Column name to dtype mapping passed to
+            `pd.read_csv` (default is None).
+        usecols : list
+            Subset of columns to read from infile (default is None).
+        chunksize : int
+            Number of rows to read per chunk,
+            None reads the whole file at once (default is None).
+        output_format : str
+            Format of the saved train and test
+            files - "parquet" or "csv" (default is "parquet").
     """
 
     def __init__(
@@ -69,20 +136,31 @@ class DataLoader:
         infile: str,
         download: bool = False,
         test_size: float = 0.2,
+        dtype: Optional[dict] = None,
+        usecols: Optional[list] = None,
+        chunksize: Optional[int] = None,
+        output_format: str = "parquet",
     ) -> None:
         self.input_path = Path(input_path)
         self.output_path = Path(output_path)
         self.infile = infile
         self.download = download
         self.test_size = test_size
+        self.dtype = dtype
+        self.usecols = usecols
+        self.chunksize = chunksize
+        self.output_format = output_format
+        self._cached_df = None
+        self._cached_strat = None
+        self._cached_params = None
 
     def _download_data(self, url: str) -> None:
         """Download the data from a specified URL
 
         Download the data from a
-        specified URL and if the data is in archive format.
-        the archive file
-        will be removed subsequently. Often you need override.
+        specified URL and extract the gzipped tar archive
+        while it is being downloaded, no temporary archive
+        file is written to disk. Often you need override.
         this function
         in a child class to adapt as per your requirement.
 
@@ -93,26 +171,34 @@ class DataLoader:
         """
         data_dir = self.input_path  # download in data/raw folder
         infile = data_dir / self.infile  # csv data file
-        filepath = data_dir / "temp.tgz"  # temporary archive file
         data_dir.mkdir(exist_ok=True)
         logging.warning(
             f"Input directory {data_dir} created if not exists already"
         )
 
         if not infile.exists():
-            request.urlretrieve(url, filepath, PBar())
-            logging.info(f"Downloaded file to {filepath}")
-            logging.info("Unzipping and removing the archive file")
-            # Extract the archive file
-            with tarfile.open(filepath, "r") as f:
-                f.extractall(data_dir)
-            filepath.unlink(missing_ok=True)
+            logging.info(f"Downloading and extracting {url} to {data_dir}")
+            # Stream the archive straight into the tar decoder
+            with request.urlopen(url) as resp:
+                total_size = int(resp.headers.get("Content-Length") or 0)
+                with tarfile.open(
+                    fileobj=ProgressReader(resp, total_size, PBar()),
+                    mode="r|gz",
+                    bufsize=CHUNK_SIZE,
+                ) as f:
+                    f.extractall(data_dir)
         else:
             logging.warning(f"{infile} already exists, file not downloaded")
 
     def _load_data(self) -> pd.DataFrame:
         """Load data located at input_path
 
+        Parquet infiles (`.parquet` suffix) are read directly,
+        only the `usecols` columns are deserialized. Csv infiles
+        are parsed on multiple threads with pyarrow when it is
+        installed and neither `dtype` nor `chunksize` is set,
+        otherwise with the pandas C parser.
+
         Returns
         -------
         pd.DataFrame
@@ -124,8 +210,43 @@ class DataLoader:
         """
         infile = self.input_path / self.infile
         try:
-            df = pd.read_csv(infile)
-            return df
+            if infile.suffix == ".parquet":
+                return pd.read_parquet(infile, columns=self.usecols)
+            use_arrow = pa is not None and self.dtype is None
+            if use_arrow and self.chunksize is None:
+                table = pa_csv.read_csv(
+                    str(infile),
+                    read_options=pa_csv.ReadOptions(
+                        block_size=1 << 22, use_threads=True
+                    ),
+                    convert_options=pa_csv.ConvertOptions(
+                        include_columns=self.usecols,
+                        strings_can_be_null=True,
+                    ),
+                )
+                if self.usecols is not None:
+                    # pd.read_csv keeps the file's column order, match it
+                    header = pd.read_csv(infile, nrows=0).columns
+                    table = table.select(
+                        [col for col in header if col in self.usecols]
+                    )
+                return table.to_pandas(self_destruct=True, split_blocks=True)
+            if self.chunksize is None:
+                return pd.read_csv(
+                    infile,
+                    dtype=self.dtype,
+                    usecols=self.usecols,
+                    engine="c",
+                    low_memory=False,
+                )
+            chunks = pd.read_csv(
+                infile,
+                dtype=self.dtype,
+                usecols=self.usecols,
+                engine="c",
+                chunksize=self.chunksize,
+            )
+            return pd.concat(chunks, copy=False)
         except FileNotFoundError:
             logging.error(
                 f"{infile} does not exist, download = {self.download}"
@@ -134,38 +255,169 @@ class DataLoader:
                 f"{infile} does not exist, set 'download = True'"
             )
 
+    def _income_range(self, df: pd.DataFrame) -> np.ndarray:
+        """Bin `median_income` into the 5 income ranges used as strata
+
+        The ranges are 1.5 wide, so the bin is simply
+        `median_income / 1.5` truncated and clipped to 0 - 4.
+        A parallel Numba loop is used when numba is installed.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Loaded dataset with a `median_income` column
+
+        Returns
+        -------
+        np.ndarray
+            Integer income range (0 - 4) of every row
+
+        Raises
+        ------
+        ValueError
+            If `median_income` has missing values
+        """
+        mi = df["median_income"].to_numpy(dtype=np.float32)
+        if np.isnan(mi).any():
+            raise ValueError(
+                "median_income has missing values, cannot stratify"
+            )
+        if _bin_income is not None:
+            out = np.empty(mi.shape[0], dtype=np.int8)
+            _bin_income(mi, out)
+            return out
+        return np.clip(mi / np.float32(1.5), 0, 4).astype(np.int8)
+
+    def _split_indices(self) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        """Load the dataset and compute Stratified Train and Test row indices
+
+        Data is stratified with respect to the income range,
+        i.e. `median_income` binned at 1.5, 3, 4.5 and 6
+        (see `_income_range`).
+        The loaded data and its strata are cached on the instance,
+        so repeated calls (e.g. with a different `test_size`)
+        only reshuffle the row indices. The data is reloaded when
+        any of `input_path`, `infile`, `dtype`, `usecols` or
+        `chunksize` changed since the cached load.
+
+        Returns
+        -------
+        Tuple[pd.DataFrame, np.ndarray, np.ndarray]
+            loaded dataframe, train and test row positions
+        """
+        params = (
+            self.input_path,
+            self.infile,
+            copy.deepcopy(self.dtype),
+            # list, pd.Index or ndarray, compared element-wise as a tuple
+            tuple(self.usecols) if self.usecols is not None else None,
+            self.chunksize,
+        )
+        if self._cached_df is None or params != self._cached_params:
+            self._cached_df = self._load_data()
+            self._cached_strat = self._income_range(self._cached_df)
+            self._cached_params = params
+        df, strat = self._cached_df, self._cached_strat
+
+        sss = StratifiedShuffleSplit(
+            n_splits=1, test_size=self.test_size, random_state=43
+        )
+        train_idx, test_idx = next(sss.split(np.empty(len(df)), strat))
+        return df, train_idx, test_idx
+
     def _split(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """Load and Split the dataset into Stratified Train and Test
 
-        Data is stratified with respect to the income range,
+        See `_split_indices` for how the rows are stratified.
 
         Returns
         -------
         Tuple[pd.DataFrame, pd.DataFrame]
             train and test dataframes
         """
-        df = self._load_data()
-        df["income_range"] = pd.cut(
-            df["median_income"],
-            [0, 1.5, 3, 4.5, 6, np.inf],
-            labels=list(range(5)),
-        )
-
-        train, test = tts(
-            df,
-            test_size=self.test_size,
-            random_state=43,
-            shuffle=True,
-            stratify=df["income_range"],
-        )
+        df, train_idx, test_idx = self._split_indices()
+        train, test = df.iloc[train_idx], df.iloc[test_idx]
         logging.info(
-            f"Data shapes: original -
-            {df.shape}, train - {train.shape}, test - {test.shape}"
+            f"Data shapes: original - {df.shape}, "
+            f"train - {train.shape}, test - {test.shape}"
         )
-        train.drop(["income_range"], axis=1, inplace=True)
-        test.drop(["income_range"], axis=1, inplace=True)
         return train, test
 
+    def _split_arrays(
+        self, feature_cols: Union[list, pd.Index], target_col: str
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Load and Split the dataset into NumPy arrays
+
+        Same stratified split as `_split`, but the features are
+        returned as a float32 matrix (the dtype sklearn trees work on)
+        and the target as a float64 vector, ready to be fed to sklearn.
+        Rows with a missing feature or target are dropped after the
+        split.
+
+        Parameters
+        ----------
+        feature_cols : Union[list, pd.Index]
+            Columns used as features
+        target_col : str
+            Column used as target
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+            X_train, X_test, y_train and y_test
+
+        Raises
+        ------
+        ValueError
+            If target_col is one of the feature_cols
+        """
+        if target_col in feature_cols:
+            raise ValueError(f"target {target_col} is also a feature column")
+        df, train_idx, test_idx = self._split_indices()
+        X = df[feature_cols].to_numpy(dtype=np.float32)
+        y = df[target_col].to_numpy(dtype=np.float64)
+        complete = ~(np.isnan(X).any(axis=1) | np.isnan(y))
+        train_idx = train_idx[complete[train_idx]]
+        test_idx = test_idx[complete[test_idx]]
+        return X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+
+    def _save(self, df: pd.DataFrame, name: str) -> None:
+        """Save a split to `output_path/name.output_format`
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Split to save
+        name : str
+            File name without the extension
+
+        Raises
+        ------
+        ValueError
+            If output_format is neither "parquet" nor "csv"
+        ImportError
+            If output_format is "parquet" and pyarrow is not installed
+        """
+        outfile = self.output_path / f"{name}.{self.output_format}"
+        if self.output_format == "parquet":
+            if pa is None:
+                raise ImportError(
+                    "output_format 'parquet' requires pyarrow, "
+                    "install pyarrow or use output_format 'csv'"
+                )
+            df.to_parquet(outfile, compression="snappy", index=False)
+        elif self.output_format == "csv":
+            if pa is None:
+                df.to_csv(outfile, index=False)
+            else:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                pa_csv.write_csv(table, str(outfile))
+        else:
+            raise ValueError(
+                f"Unsupported output_format '{self.output_format}', "
+                "use 'parquet' or 'csv'"
+            )
+
     def __call__(
         self, save_to_disk: bool = False, url: str = None
     ) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
@@ -194,11 +446,12 @@ class DataLoader:
             self._download_data(url)
         train, test = self._split()
         if save_to_disk:
-            train_out = self.output_path / "train.csv"
-            test_out = self.output_path / "test.csv"
-            train.to_csv(train_out, index=False)
-            test.to_csv(test_out, index=False)
-            logging.info("train.csv and test.csv saved to disk")
+            for name, data in (("train", train), ("test", test)):
+                self._save(data, name)
+            logging.info(
+                f"train.{self.output_format} and "
+                f"test.{self.output_format} saved to disk"
+            )
             return
 
         return train, test
@@ -207,9 +460,6 @@ class DataLoader:
 if __name__ == "__main__":
     import argparse
     import configparser
-    import logging
-
-    import setup
 
     # load default cmd arguments from config.ini file
     config = configparser.ConfigParser()
@@ -219,8 +469,8 @@ if __name__ == "__main__":
     # Setup Argument Parser
     parser = argparse.ArgumentParser(
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
-        description="Data Ingestion script -
-        download, load, and split dataset into train and test.",
+        description="Data Ingestion script - "
+        "download, load, and split dataset into train and test.",
         epilog="Default arguments are stored in config.ini file.",
         fromfile_prefix_chars="@",
     )
@@ -256,6 +506,14 @@ if __name__ == "__main__":
         type=float,
         help="Parameter for train_test_split",
     )
+    parser.add_argument(
+        "-f",
+        "--output_format",
+        type=str,
+        choices=["parquet", "csv"],
+        default="parquet",
+        help="File format of the train and test splits",
+    )
     parser.add_argument(
         "-l", "--level", type=str, choices=log_levels, help="Logging level"
     )
@@ -276,8 +534,13 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     # setup logger
-    logger = setup.setup_logging(
-        args.level, args.quiet, args.log_file, __name__
+    handlers = []
+    if args.log_file:
+        handlers.append(logging.FileHandler(args.log_file))
+    if not args.quiet:
+        handlers.append(logging.StreamHandler())
+    logging.basicConfig(
+        level=args.level, handlers=handlers or [logging.NullHandler()]
     )
 
     # log command line arguments
@@ -290,6 +553,7 @@ if __name__ == "__main__":
         args.infile,
         args.download,
         args.test_size,
+        output_format=args.output_format,
     )
 
     url = config["data_url"]["url"]  # load url from config.ini
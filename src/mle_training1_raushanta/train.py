@@ -1,57 +1,72 @@
 import argparse
+from pathlib import Path
 
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
+
+from mle_training1_raushanta.ingest_data import DataLoader
+
+FEATURES = pd.Index(
+    [
+        "total_rooms",
+        "total_bedrooms",
+        "population",
+        "households",
+        "median_income",
+    ]
+)
+TARGET = "median_house_value"
 
 
 def train_options():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--normalize", default=True, type=bool, help="maximum depth")
     parser.add_argument(
         "--n_estimators", default=100, type=int, help="number of estimators"
     )
     parser.add_argument(
         "--max_features",
-        default=6,
+        default=len(FEATURES),
         type=int,
         help="maximum of features",
     )
     parser.add_argument("--max_depth", default=5, type=int, help="maximum depth")
+    parser.add_argument(
+        "--max_samples",
+        default=None,
+        type=float,
+        help="fraction of samples drawn to train each tree",
+    )
     opt = parser.parse_args()
     return opt
 
 
-df = pd.read_csv("housing.csv")
-# print(df.head())
-opt = train_options()
-df.dropna(inplace=True)
-X = df[
-    [
-        "total_rooms",
-        "total_bedrooms",
-        "population",
-        "households",
-        "median_income",
-        "median_house_value",
-    ]
-]
-y = df["median_house_value"]
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
-# print(X)
-# print(y)
+def _ensure_parquet(path):
+    """Convert the csv file at `path` to parquet once and return its path."""
+    parquet_path = Path(path).with_suffix(".parquet")
+    if not parquet_path.exists():
+        pd.read_csv(path).to_parquet(parquet_path, compression="snappy")
+    return parquet_path
 
-if opt.normalize == True:
-    scaler = StandardScaler()
-    X = scaler.fit_transform(X)
+
+opt = train_options()
+# stratified split shared with the data ingestion step, features come
+# back as a float32 array since the tree builder works on float32 anyway
+X_train, X_test, y_train, y_test = DataLoader(
+    input_path=".",
+    output_path=".",
+    infile=_ensure_parquet("housing.csv").name,
+    usecols=FEATURES.tolist() + [TARGET],
+)._split_arrays(FEATURES, TARGET)
 
 rf = RandomForestRegressor(
     n_estimators=opt.n_estimators,
     max_features=opt.max_features,
     max_depth=opt.max_depth,
+    max_samples=opt.max_samples,
+    n_jobs=-1,
+    random_state=43,
 )
 model = rf.fit(X_train, y_train)
 y_pred = model.predict(X_test)
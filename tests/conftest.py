@@ -0,0 +1,22 @@
+import tarfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+HOUSING_PATH = Path(__file__).resolve().parents[1] / "datasets" / "housing"
+
+
+@pytest.fixture(scope="session")
+def housing_df(tmp_path_factory):
+    # Parse the housing csv once per session and share it through parquet
+    pytest.importorskip("pyarrow")
+    data_dir = tmp_path_factory.mktemp("data")
+    p = data_dir / "housing.parquet"
+    csv_path = HOUSING_PATH / "housing.csv"
+    if not csv_path.exists():
+        with tarfile.open(HOUSING_PATH / "housing.tgz") as tgz:
+            tgz.extractall(data_dir)
+        csv_path = data_dir / "housing.csv"
+    pd.read_csv(csv_path).to_parquet(p)
+    return pd.read_parquet(p)
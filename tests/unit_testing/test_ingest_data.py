@@ -0,0 +1,215 @@
+import tarfile
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mle_training1_raushanta import ingest_data
+from mle_training1_raushanta.ingest_data import DataLoader
+
+INCOMES = [0.5, 1.5, 2.9, 4.5, 5.99, 6.0, 1e9]
+
+
+def housing_like(n=50):
+    # small frame with every income range present n // 5 times
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "median_income": np.tile([0.5, 2.0, 3.5, 5.0, 7.0], n // 5),
+            "total_rooms": rng.integers(100, 1000, n),
+            "total_bedrooms": rng.uniform(10, 200, n),
+            "ocean_proximity": rng.choice(["INLAND", "NEAR BAY"], n),
+            "median_house_value": rng.uniform(1e4, 5e5, n),
+        }
+    )
+
+
+@pytest.fixture(params=["pyarrow", "pandas"])
+def backend(request, monkeypatch):
+    # run with pyarrow when installed and with the pandas fallback
+    if request.param == "pyarrow" and ingest_data.pa is None:
+        pytest.skip("needs pyarrow")
+    if request.param == "pandas":
+        monkeypatch.setattr(ingest_data, "pa", None)
+    return request.param
+
+
+@pytest.fixture
+def csv_loader(tmp_path):
+    housing_like().to_csv(tmp_path / "housing.csv", index=False)
+    return DataLoader(tmp_path, tmp_path, "housing.csv")
+
+
+def test_download_data_extracts_archive(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    housing_like().to_csv(src / "housing.csv", index=False)
+    archive = tmp_path / "housing.tgz"
+    with tarfile.open(archive, "w:gz") as tgz:
+        tgz.add(src / "housing.csv", arcname="housing.csv")
+
+    raw = tmp_path / "raw"
+    loader = DataLoader(raw, tmp_path, "housing.csv", download=True)
+    loader._download_data(archive.as_uri())
+
+    assert sorted(p.name for p in raw.iterdir()) == ["housing.csv"]
+    pd.testing.assert_frame_equal(
+        pd.read_csv(raw / "housing.csv"), pd.read_csv(src / "housing.csv")
+    )
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "csv"])
+def test_save_round_trip(csv_loader, backend, output_format):
+    if output_format == "parquet" and backend == "pandas":
+        pytest.skip("parquet output needs pyarrow")
+    csv_loader.output_format = output_format
+    train, test = csv_loader._split()
+    csv_loader(save_to_disk=True)
+
+    read = pd.read_parquet if output_format == "parquet" else pd.read_csv
+    out = csv_loader.output_path
+    pd.testing.assert_frame_equal(
+        read(out / f"train.{output_format}"), train.reset_index(drop=True)
+    )
+    pd.testing.assert_frame_equal(
+        read(out / f"test.{output_format}"), test.reset_index(drop=True)
+    )
+
+
+def test_save_parquet_requires_pyarrow(csv_loader, monkeypatch):
+    monkeypatch.setattr(ingest_data, "pa", None)
+    with pytest.raises(ImportError):
+        csv_loader(save_to_disk=True)
+
+
+def test_save_unknown_format(csv_loader):
+    csv_loader.output_format = "json"
+    with pytest.raises(ValueError):
+        csv_loader(save_to_disk=True)
+
+
+def test_split_caches_loaded_data(csv_loader):
+    with mock.patch.object(
+        csv_loader, "_load_data", wraps=csv_loader._load_data
+    ) as load:
+        train, test = csv_loader._split()
+        assert len(test) == 10
+        csv_loader.test_size = 0.4
+        train, test = csv_loader._split()
+        assert len(test) == 20
+    assert load.call_count == 1
+
+
+@pytest.mark.parametrize("container", [list, pd.Index, np.array])
+def test_split_reloads_when_load_params_change(csv_loader, container):
+    with mock.patch.object(
+        csv_loader, "_load_data", wraps=csv_loader._load_data
+    ) as load:
+        csv_loader._split()
+        csv_loader.usecols = container(
+            ["median_income", "median_house_value"]
+        )
+        train, test = csv_loader._split()
+        # same usecols again must hit the cache
+        train, test = csv_loader._split()
+    assert load.call_count == 2
+    assert list(train.columns) == ["median_income", "median_house_value"]
+
+
+def test_income_range_bins(csv_loader, monkeypatch):
+    monkeypatch.setattr(ingest_data, "_bin_income", None)
+    df = pd.DataFrame({"median_income": INCOMES})
+    np.testing.assert_array_equal(
+        csv_loader._income_range(df), [0, 1, 1, 3, 3, 4, 4]
+    )
+    assert csv_loader._income_range(df).dtype == np.int8
+
+
+def test_income_range_rejects_missing(csv_loader, monkeypatch):
+    monkeypatch.setattr(ingest_data, "_bin_income", None)
+    df = pd.DataFrame({"median_income": [1.0, np.nan]})
+    with pytest.raises(ValueError):
+        csv_loader._income_range(df)
+
+
+@pytest.mark.parametrize(
+    "usecols", [None, ["median_income", "households", "ocean_proximity"]]
+)
+def test_load_data_matches_read_csv(tmp_path, backend, usecols):
+    infile = tmp_path / "housing.csv"
+    infile.write_text(
+        "households,median_income,ocean_proximity,total_rooms\n"
+        "1,2.5,x,10\n"
+        "2,,,20\n"
+        "3,4.0,y,30\n"
+    )
+    expected = pd.read_csv(infile, usecols=usecols)
+    arrow = DataLoader(tmp_path, tmp_path, "housing.csv", usecols=usecols)
+    chunked = DataLoader(
+        tmp_path, tmp_path, "housing.csv", usecols=usecols, chunksize=2
+    )
+    pd.testing.assert_frame_equal(arrow._load_data(), expected)
+    pd.testing.assert_frame_equal(chunked._load_data(), expected)
+
+
+def test_split_housing_data(housing_df, tmp_path):
+    housing_df.to_parquet(tmp_path / "housing.parquet")
+    loader = DataLoader(tmp_path, tmp_path, "housing.parquet")
+    train, test = loader._split()
+    assert len(housing_df) == 20640
+    assert len(train) + len(test) == len(housing_df)
+    assert len(test) == len(housing_df) // 5
+    # income ranges are equally represented in both splits
+    train_props = np.bincount(loader._income_range(train)) / len(train)
+    test_props = np.bincount(loader._income_range(test)) / len(test)
+    np.testing.assert_allclose(train_props, test_props, atol=1e-3)
+
+
+def test_split_arrays(tmp_path):
+    df = housing_like()
+    df.loc[[3, 17], "total_bedrooms"] = np.nan
+    df.loc[8, "median_house_value"] = np.nan
+    df.to_csv(tmp_path / "housing.csv", index=False)
+    loader = DataLoader(tmp_path, tmp_path, "housing.csv")
+    features = ["total_rooms", "total_bedrooms", "median_income"]
+    target = "median_house_value"
+
+    X_train, X_test, y_train, y_test = loader._split_arrays(features, target)
+    train, test = loader._split()
+
+    assert X_train.dtype == X_test.dtype == np.float32
+    assert y_train.dtype == y_test.dtype == np.float64
+    # incomplete rows are dropped from each split after splitting
+    for X, y, split in ((X_train, y_train, train), (X_test, y_test, test)):
+        complete = split[features + [target]].notna().all(axis=1)
+        assert len(X) == len(y) == len(split) - (~complete).sum()
+        np.testing.assert_array_equal(
+            X, split.loc[complete, features].to_numpy(np.float32)
+        )
+        np.testing.assert_array_equal(y, split.loc[complete, target])
+    assert len(X_train) + len(X_test) == len(df) - 3
+
+
+def test_split_arrays_rejects_target_in_features(csv_loader):
+    with pytest.raises(ValueError):
+        csv_loader._split_arrays(
+            ["median_income", "median_house_value"], "median_house_value"
+        )
+
+
+@pytest.mark.skipif(ingest_data._bin_income is None, reason="needs numba")
+def test_bin_income_matches_numpy(csv_loader, monkeypatch):
+    mi = np.array(INCOMES + [-0.0, -1.0, -1e9, 3.0, 4.4999], dtype=np.float32)
+    out = np.empty(mi.shape[0], dtype=np.int8)
+    ingest_data._bin_income(mi, out)
+    # numba path end to end, then the numpy fallback
+    df = pd.DataFrame({"median_income": mi})
+    np.testing.assert_array_equal(csv_loader._income_range(df), out)
+    nan_df = pd.DataFrame({"median_income": [1.0, np.nan]})
+    with pytest.raises(ValueError):
+        csv_loader._income_range(nan_df)
+    monkeypatch.setattr(ingest_data, "_bin_income", None)
+    np.testing.assert_array_equal(csv_loader._income_range(df), out)
+    with pytest.raises(ValueError):
+        csv_loader._income_range(nan_df)